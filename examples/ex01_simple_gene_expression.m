@@ -38,10 +38,7 @@ classdef ex01_simple_gene_expression
 
 		function M = mass_matrix(~)
 			%% Mass matrix for DAE systems.
-			M = [
-				1 0 
-				0 1 
-			];
+			M = diag([1 1]);
 		end
 
 		function opts = simulation_options(~)
@@ -65,7 +62,7 @@ classdef ex01_simple_gene_expression
 			mRNA = x(1,:);
 			protein = x(2,:);
 
-			% Assigment states:
+			% (no assignment states)
 
 			% der(mRNA)
 			dx(1,1) =  + (p.k_m) - (p.d_m.*mRNA) + (p.k_p.*mRNA) - (p.k_p.*mRNA);
@@ -83,7 +80,7 @@ classdef ex01_simple_gene_expression
 			mRNA = x(1,:);
 			protein = x(2,:);
 
-			% Assigment states:
+			% (no assignment states)
 
 			% Save simulation time.
 			out.t = t;
@@ -93,14 +90,17 @@ classdef ex01_simple_gene_expression
 
 
 			% Save states.
-			out.mRNA = (mRNA.*ones_t)';
-			out.protein = (protein.*ones_t)';
+			values = {mRNA, protein};
+			names = {'mRNA', 'protein'};
+			for i = 1:numel(names)
+				out.(names{i}) = (values{i}.*ones_t)';
+			end
 
 			% Save parameters.
-			out.k_m = (p.k_m.*ones_t)';
-			out.d_m = (p.d_m.*ones_t)';
-			out.k_p = (p.k_p.*ones_t)';
-			out.d_p = (p.d_p.*ones_t)';
+			names = {'k_m', 'd_m', 'k_p', 'd_p'};
+			for i = 1:numel(names)
+				out.(names{i}) = (p.(names{i}).*ones_t)';
+			end
 
 		end
 		function plot(~,out)
@@ -44,12 +44,7 @@ classdef ex02_two_genes_expression
 
 		function M = mass_matrix(~)
 			%% Mass matrix for DAE systems.
-			M = [
-				1 0 0 0 
-				0 1 0 0 
-				0 0 1 0 
-				0 0 0 1 
-			];
+			M = diag([1 1 1 1]);
 		end
 
 		function opts = simulation_options(~)
@@ -75,7 +70,7 @@ classdef ex02_two_genes_expression
 			mRNA_B = x(3,:);
 			protein_B = x(4,:);
 
-			% Assigment states:
+			% (no assignment states)
 
 			% der(mRNA_A)
 			dx(1,1) =  + (p.k_m_A) - (p.d_m_A.*mRNA_A) + (p.k_p_A.*mRNA_A) - (p.k_p_A.*mRNA_A);
@@ -101,7 +96,7 @@ classdef ex02_two_genes_expression
 			mRNA_B = x(3,:);
 			protein_B = x(4,:);
 
-			% Assigment states:
+			% (no assignment states)
 
 			% Save simulation time.
 			out.t = t;
@@ -111,20 +106,17 @@ classdef ex02_two_genes_expression
 
 
 			% Save states.
-			out.mRNA_A = (mRNA_A.*ones_t)';
-			out.protein_A = (protein_A.*ones_t)';
-			out.mRNA_B = (mRNA_B.*ones_t)';
-			out.protein_B = (protein_B.*ones_t)';
+			values = {mRNA_A, protein_A, mRNA_B, protein_B};
+			names = {'mRNA_A', 'protein_A', 'mRNA_B', 'protein_B'};
+			for i = 1:numel(names)
+				out.(names{i}) = (values{i}.*ones_t)';
+			end
 
 			% Save parameters.
-			out.k_m_A = (p.k_m_A.*ones_t)';
-			out.d_m_A = (p.d_m_A.*ones_t)';
-			out.k_p_A = (p.k_p_A.*ones_t)';
-			out.d_p_A = (p.d_p_A.*ones_t)';
-			out.k_m_B = (p.k_m_B.*ones_t)';
-			out.d_m_B = (p.d_m_B.*ones_t)';
-			out.k_p_B = (p.k_p_B.*ones_t)';
-			out.d_p_B = (p.d_p_B.*ones_t)';
+			names = {'k_m_A', 'd_m_A', 'k_p_A', 'd_p_A', 'k_m_B', 'd_m_B', 'k_p_B', 'd_p_B'};
+			for i = 1:numel(names)
+				out.(names{i}) = (p.(names{i}).*ones_t)';
+			end
 
 		end
 		function plot(~,out)
@@ -38,10 +38,7 @@ classdef ex03_protein_constitutive
 
 		function M = mass_matrix(~)
 			%% Mass matrix for DAE systems.
-			M = [
-				1 0 
-				0 1 
-			];
+			M = diag([1 1]);
 		end
 
 		function opts = simulation_options(~)
@@ -65,7 +62,7 @@ classdef ex03_protein_constitutive
 			A__mRNA = x(1,:);
 			A__protein = x(2,:);
 
-			% Assigment states:
+			% (no assignment states)
 
 			% der(A__mRNA)
 			dx(1,1) =  + (p.A__k_m) - (p.A__d_m.*A__mRNA) + (p.A__k_p.*A__mRNA) - (p.A__k_p.*A__mRNA);
@@ -83,7 +80,7 @@ classdef ex03_protein_constitutive
 			A__mRNA = x(1,:);
 			A__protein = x(2,:);
 
-			% Assigment states:
+			% (no assignment states)
 
 			% Save simulation time.
 			out.t = t;
@@ -93,14 +90,17 @@ classdef ex03_protein_constitutive
 
 
 			% Save states.
-			out.A__mRNA = (A__mRNA.*ones_t)';
-			out.A__protein = (A__protein.*ones_t)';
+			values = {A__mRNA, A__protein};
+			names = {'A__mRNA', 'A__protein'};
+			for i = 1:numel(names)
+				out.(names{i}) = (values{i}.*ones_t)';
+			end
 
 			% Save parameters.
-			out.A__k_m = (p.A__k_m.*ones_t)';
-			out.A__d_m = (p.A__d_m.*ones_t)';
-			out.A__k_p = (p.A__k_p.*ones_t)';
-			out.A__d_p = (p.A__d_p.*ones_t)';
+			names = {'A__k_m', 'A__d_m', 'A__k_p', 'A__d_p'};
+			for i = 1:numel(names)
+				out.(names{i}) = (p.(names{i}).*ones_t)';
+			end
 
 		end
 		function plot(~,out)
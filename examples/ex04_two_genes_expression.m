@@ -44,12 +44,7 @@ classdef ex04_two_genes_expression
 
 		function M = mass_matrix(~)
 			%% Mass matrix for DAE systems.
-			M = [
-				1 0 0 0 
-				0 1 0 0 
-				0 0 1 0 
-				0 0 0 1 
-			];
+			M = diag([1 1 1 1]);
 		end
 
 		function opts = simulation_options(~)
@@ -75,7 +70,7 @@ classdef ex04_two_genes_expression
 			B__mRNA = x(3,:);
 			B__protein = x(4,:);
 
-			% Assigment states:
+			% (no assignment states)
 
 			% der(A__mRNA)
 			dx(1,1) =  + (p.A__k_m) - (p.A__d_m.*A__mRNA) + (p.A__k_p.*A__mRNA) - (p.A__k_p.*A__mRNA);
@@ -101,7 +96,7 @@ classdef ex04_two_genes_expression
 			B__mRNA = x(3,:);
 			B__protein = x(4,:);
 
-			% Assigment states:
+			% (no assignment states)
 
 			% Save simulation time.
 			out.t = t;
@@ -111,20 +106,17 @@ classdef ex04_two_genes_expression
 
 
 			% Save states.
-			out.A__mRNA = (A__mRNA.*ones_t)';
-			out.A__protein = (A__protein.*ones_t)';
-			out.B__mRNA = (B__mRNA.*ones_t)';
-			out.B__protein = (B__protein.*ones_t)';
+			values = {A__mRNA, A__protein, B__mRNA, B__protein};
+			names = {'A__mRNA', 'A__protein', 'B__mRNA', 'B__protein'};
+			for i = 1:numel(names)
+				out.(names{i}) = (values{i}.*ones_t)';
+			end
 
 			% Save parameters.
-			out.A__k_m = (p.A__k_m.*ones_t)';
-			out.A__d_m = (p.A__d_m.*ones_t)';
-			out.A__k_p = (p.A__k_p.*ones_t)';
-			out.A__d_p = (p.A__d_p.*ones_t)';
-			out.B__k_m = (p.B__k_m.*ones_t)';
-			out.B__d_m = (p.B__d_m.*ones_t)';
-			out.B__k_p = (p.B__k_p.*ones_t)';
-			out.B__d_p = (p.B__d_p.*ones_t)';
+			names = {'A__k_m', 'A__d_m', 'A__k_p', 'A__d_p', 'B__k_m', 'B__d_m', 'B__k_p', 'B__d_p'};
+			for i = 1:numel(names)
+				out.(names{i}) = (p.(names{i}).*ones_t)';
+			end
 
 		end
 		function plot(~,out)
@@ -45,12 +45,7 @@ classdef ex05_protein_induced
 
 		function M = mass_matrix(~)
 			%% Mass matrix for DAE systems.
-			M = [
-				1 0 0 0 
-				0 1 0 0 
-				0 0 1 0 
-				0 0 0 1 
-			];
+			M = diag([1 1 1 1]);
 		end
 
 		function opts = simulation_options(~)
@@ -116,23 +111,17 @@ classdef ex05_protein_induced
 
 
 			% Save states.
-			out.A__mRNA = (A__mRNA.*ones_t)';
-			out.A__protein = (A__protein.*ones_t)';
-			out.B__mRNA = (B__mRNA.*ones_t)';
-			out.B__protein = (B__protein.*ones_t)';
-			out.B__k_m = (B__k_m.*ones_t)';
-			out.B__TF = (B__TF.*ones_t)';
+			values = {A__mRNA, A__protein, B__mRNA, B__protein, B__k_m, B__TF};
+			names = {'A__mRNA', 'A__protein', 'B__mRNA', 'B__protein', 'B__k_m', 'B__TF'};
+			for i = 1:numel(names)
+				out.(names{i}) = (values{i}.*ones_t)';
+			end
 
 			% Save parameters.
-			out.A__k_m = (p.A__k_m.*ones_t)';
-			out.A__d_m = (p.A__d_m.*ones_t)';
-			out.A__k_p = (p.A__k_p.*ones_t)';
-			out.A__d_p = (p.A__d_p.*ones_t)';
-			out.B__d_m = (p.B__d_m.*ones_t)';
-			out.B__k_p = (p.B__k_p.*ones_t)';
-			out.B__d_p = (p.B__d_p.*ones_t)';
-			out.B__h = (p.B__h.*ones_t)';
-			out.B__k_m_max = (p.B__k_m_max.*ones_t)';
+			names = {'A__k_m', 'A__d_m', 'A__k_p', 'A__d_p', 'B__d_m', 'B__k_p', 'B__d_p', 'B__h', 'B__k_m_max'};
+			for i = 1:numel(names)
+				out.(names{i}) = (p.(names{i}).*ones_t)';
+			end
 
 		end
 		function plot(~,out)
@@ -53,14 +53,7 @@ classdef ex06_antithetic_controller
 
 		function M = mass_matrix(~)
 			%% Mass matrix for DAE systems.
-			M = [
-				1 0 0 0 0 0 
-				0 1 0 0 0 0 
-				0 0 1 0 0 0 
-				0 0 0 1 0 0 
-				0 0 0 0 1 0 
-				0 0 0 0 0 1 
-			];
+			M = diag([1 1 1 1 1 1]);
 		end
 
 		function opts = simulation_options(~)
@@ -140,33 +133,17 @@ classdef ex06_antithetic_controller
 
 
 			% Save states.
-			out.circuit__z1__mRNA = (circuit__z1__mRNA.*ones_t)';
-			out.circuit__z1__protein = (circuit__z1__protein.*ones_t)';
-			out.circuit__z2__mRNA = (circuit__z2__mRNA.*ones_t)';
-			out.circuit__z2__protein = (circuit__z2__protein.*ones_t)';
-			out.circuit__z2__k_m = (circuit__z2__k_m.*ones_t)';
-			out.circuit__z2__TF = (circuit__z2__TF.*ones_t)';
-			out.circuit__x__mRNA = (circuit__x__mRNA.*ones_t)';
-			out.circuit__x__protein = (circuit__x__protein.*ones_t)';
-			out.circuit__x__k_m = (circuit__x__k_m.*ones_t)';
-			out.circuit__x__TF = (circuit__x__TF.*ones_t)';
+			values = {circuit__z1__mRNA, circuit__z1__protein, circuit__z2__mRNA, circuit__z2__protein, circuit__z2__k_m, circuit__z2__TF, circuit__x__mRNA, circuit__x__protein, circuit__x__k_m, circuit__x__TF};
+			names = {'circuit__z1__mRNA', 'circuit__z1__protein', 'circuit__z2__mRNA', 'circuit__z2__protein', 'circuit__z2__k_m', 'circuit__z2__TF', 'circuit__x__mRNA', 'circuit__x__protein', 'circuit__x__k_m', 'circuit__x__TF'};
+			for i = 1:numel(names)
+				out.(names{i}) = (values{i}.*ones_t)';
+			end
 
 			% Save parameters.
-			out.circuit__z1__k_m = (p.circuit__z1__k_m.*ones_t)';
-			out.circuit__z1__d_m = (p.circuit__z1__d_m.*ones_t)';
-			out.circuit__z1__k_p = (p.circuit__z1__k_p.*ones_t)';
-			out.circuit__z1__d_p = (p.circuit__z1__d_p.*ones_t)';
-			out.circuit__z2__d_m = (p.circuit__z2__d_m.*ones_t)';
-			out.circuit__z2__k_p = (p.circuit__z2__k_p.*ones_t)';
-			out.circuit__z2__d_p = (p.circuit__z2__d_p.*ones_t)';
-			out.circuit__z2__h = (p.circuit__z2__h.*ones_t)';
-			out.circuit__z2__k_m_max = (p.circuit__z2__k_m_max.*ones_t)';
-			out.circuit__x__d_m = (p.circuit__x__d_m.*ones_t)';
-			out.circuit__x__k_p = (p.circuit__x__k_p.*ones_t)';
-			out.circuit__x__d_p = (p.circuit__x__d_p.*ones_t)';
-			out.circuit__x__h = (p.circuit__x__h.*ones_t)';
-			out.circuit__x__k_m_max = (p.circuit__x__k_m_max.*ones_t)';
-			out.circuit__gamma = (p.circuit__gamma.*ones_t)';
+			names = {'circuit__z1__k_m', 'circuit__z1__d_m', 'circuit__z1__k_p', 'circuit__z1__d_p', 'circuit__z2__d_m', 'circuit__z2__k_p', 'circuit__z2__d_p', 'circuit__z2__h', 'circuit__z2__k_m_max', 'circuit__x__d_m', 'circuit__x__k_p', 'circuit__x__d_p', 'circuit__x__h', 'circuit__x__k_m_max', 'circuit__gamma'};
+			for i = 1:numel(names)
+				out.(names{i}) = (p.(names{i}).*ones_t)';
+			end
 
 		end
 		function plot(~,out)
@@ -145,7 +145,9 @@ class DaeModel:
             states.append(state)
             i += 1
 
-        # Assign equation property from reactions.
+        # Assign equation property from reactions. The terms of each state are
+        # collected and joined once all the reactions are processed.
+        reaction_terms = {state["id"]: [] for state in states}
         for reaction in self.model.getListOfReactions():
             ast = reaction.getKineticLaw().getMath()
             equation = formulaToL3String(ast)
@@ -157,7 +159,7 @@ class DaeModel:
 
                 for product in reaction.getListOfProducts():
                     if state["id"] == product.getSpecies():
-                        state["equation"] += "+ (" + equation + ")"
+                        reaction_terms[state["id"]].append("+ (" + equation + ")")
 
                         # Once the species is found in a reacion.
                         if state["definitionType"] == DefinitionType.REACTION_OR_RULE:
@@ -166,13 +168,16 @@ class DaeModel:
 
                 for reactant in reaction.getListOfReactants():
                     if state["id"] == reactant.getSpecies():
-                        state["equation"] += "- (" + equation + ")"
+                        reaction_terms[state["id"]].append("- (" + equation + ")")
 
                         # Once the species is found in a reaction.
                         if state["definitionType"] == DefinitionType.REACTION_OR_RULE:
                             # Set the species to be only defined by reactions.
                             state["definitionType"] = DefinitionType.REACTION
 
+        for state in states:
+            state["equation"] = "".join(reaction_terms[state["id"]])
+
         # Assign equation to algebraic states:
         for state in states:
             # All reactions are set, states can only be defined now by rules.
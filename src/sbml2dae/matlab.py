@@ -1,9 +1,106 @@
-from io import BytesIO
+from collections import defaultdict, deque
+import functools
 import math
-from tokenize import ENCODING, NAME, OP, tokenize
+import re
 
 from sbml2dae.dae_model import StateType
 
+# Buffer size used when writing the exported files.
+_BUFFER_SIZE = 2**20
+
+# Header comment of the generated files, for each indentation level used.
+_WARNING_TEMPLATE = (
+    "{tab}% This file was automatically generated by OneModel.\n"
+    "{tab}% Any changes you make to it will be overwritten the next time\n"
+    "{tab}% the file is generated.\n\n"
+)
+_WARNINGS = {tab: _WARNING_TEMPLATE.format(tab="\t" * tab) for tab in (0, 1)}
+
+# Example driver script, only the model name changes between models.
+_EXAMPLE_TEMPLATE = (
+    '%% Example driver script for simulating "{name}" model.\n'
+    "{warning}"
+    "clear all;\n"
+    "close all;\n"
+    "\n% Init model.\n"
+    "m = {name}();\n"
+    "\n% Solver options.\n"
+    "opt = odeset('AbsTol',1e-8,'RelTol',1e-8);\n"
+    "opt = odeset(opt,'Mass',m.M);\n"
+    "\n% Simulation time span.\n"
+    "tspan = [m.opts.t_init m.opts.t_end];\n"
+    "\n[t,x] = ode15s(@(t,x) m.ode(t,x,m.p),tspan,m.x0,opt);\n"
+    "out = m.simout2struct(t,x,m.p);\n"
+    "\n% Plot result.\n"
+    "m.plot(out);\n"
+)
+
+# Class definition, properties and start of the methods block.
+_CLASS_HEADER_TEMPLATE = (
+    "classdef {name}\n"
+    "{warning}"
+    "\tproperties\n"
+    "\t\tp      % Default model parameters.\n"
+    "\t\tx0     % Default initial conditions.\n"
+    "\t\tM      % Mass matrix for DAE systems.\n"
+    "\t\topts   % Simulation options.\n"
+    "\tend\n"
+    "\n"
+    "\tmethods\n"
+)
+
+_CONSTRUCTOR_TEMPLATE = (
+    "\t\tfunction obj = {name}()\n"
+    "\t\t\t%% Constructor of {name}.\n"
+    "\t\t\tobj.p    = obj.default_parameters();\n"
+    "\t\t\tobj.x0   = obj.initial_conditions();\n"
+    "\t\t\tobj.M    = obj.mass_matrix();\n"
+    "\t\t\tobj.opts = obj.simulation_options();\n"
+    "\t\tend\n"
+    "\n"
+)
+
+# Signature and documentation of the ode method.
+_ODE_HEADER = (
+    "\t\tfunction dx = ode(~,t,x,p)\n"
+    "\t\t\t%% Evaluate the ODE.\n"
+    "\t\t\t%\n"
+    "\t\t\t% Args:\n"
+    "\t\t\t%\t t Current time in the simulation.\n"
+    "\t\t\t%\t x Array with the state value.\n"
+    "\t\t\t%\t p Struct with the parameters.\n"
+    "\t\t\t%\n"
+    "\t\t\t% Return:\n"
+    "\t\t\t%\t dx Array with the ODE.\n"
+    "\n"
+)
+
+# End of a method followed by a blank line, and end of the class file.
+_END_METHOD = "\t\tend\n\n"
+_END_CLASS = "\tend\nend\n"
+
+# Numbers and names of a libSBML L3 formula. Numbers are matched before
+# names so exponents (e.g. 1e-5) are not split into a name and an operator.
+# Splitting a formula with it alternates operator chunks and tokens.
+_TOKEN_RE = re.compile(r"((?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?|[A-Za-z_]\w*)")
+
+# Translation of the operator chunks into matlab element-wise operators.
+_OPERATORS = str.maketrans(
+    {
+        "*": ".*",
+        "/": "./",
+        "^": ".^",
+        "+": " + ",
+        "-": " - ",
+        " ": None,
+        "\t": None,
+        "\n": None,
+        "\r": None,
+        "\f": None,
+        "\v": None,
+    }
+)
+
 
 class Matlab:
     """Takes a DAE model as input and exports a matlab implementation."""
@@ -13,6 +110,22 @@ class Matlab:
         self.dae = dae
         self.output_path = output_path
 
+        # Formulas only depend on the parameter and state ids, so their
+        # translation is memoized until those ids change (see _update_ids).
+        self.string2matlab = functools.lru_cache(maxsize=None)(self.string2matlab)
+        self.get_states = functools.lru_cache(maxsize=None)(self.get_states)
+
+        # Ids of parameters and states, used for identifying them in formulas.
+        self._param_ids = frozenset()
+        self._state_ids = frozenset()
+        self._update_ids(dae.get_states(), dae.get_parameters())
+
+        # Snapshot of the model states and parameters during an export.
+        self._states = None
+        self._params = None
+        self._x_states = None
+        self._assigment_states = None
+
     def export_example(self):
         """Generate an example driver script."""
         filepath = self.output_path
@@ -20,39 +133,12 @@ class Matlab:
         filepath += self.dae.get_model_name()
         filepath += "_example.m"
 
-        # Create and open the file to export.
-        f = open(filepath, "w")
-
-        # Function header.
-        name = self.dae.get_model_name()
-        f.write(f'%% Example driver script for simulating "{name}" model.\n')
-        self.write_warning(f)
-
-        # Clear and close all.
-        f.write("clear all;\n")
-        f.write("close all;\n")
+        example = _EXAMPLE_TEMPLATE.format(name=self.dae.get_model_name(), warning=_WARNINGS[0])
 
-        f.write("\n% Init model.\n")
-        f.write(f"m = {name}();\n")
-
-        # Solver options.
-        f.write("\n% Solver options.\n")
-        f.write("opt = odeset('AbsTol',1e-8,'RelTol',1e-8);\n")
-        f.write("opt = odeset(opt,'Mass',m.M);\n")
-
-        # Simulation time span.
-        f.write("\n% Simulation time span.\n")
-        f.write("tspan = [m.opts.t_init m.opts.t_end];\n")
-
-        # Simulate.
-        f.write("\n[t,x] = ode15s(@(t,x) m.ode(t,x,m.p),tspan,m.x0,opt);\n")
-        f.write("out = m.simout2struct(t,x,m.p);\n")
-
-        # Plot.
-        f.write("\n% Plot result.\n")
-        f.write("m.plot(out);\n")
-
-        f.close()
+        # Create and open the file to export. It is written as bytes, encoded
+        # once, to skip the text layer and its newline translation.
+        with open(filepath, "wb", buffering=_BUFFER_SIZE) as f:
+            f.write(example.encode("utf-8"))
 
         return filepath
 
@@ -63,290 +149,287 @@ class Matlab:
         filepath += self.dae.get_model_name()
         filepath += ".m"
 
-        # Create and open the file to export.
-        f = open(filepath, "w")
-
-        self.write_class_header(f)
-        self.write_constructor(f)
-        self.write_default_parameters(f)
-        self.write_initial_conditions(f)
-        self.write_mass_matrix(f)
-        self.write_simulation_options(f)
-        self.write_ode(f)
-        self.write_simout_2_struct(f)
-        self.write_plot(f)
-
-        f.write("\tend\n")
-        f.write("end\n")
-
-        f.close()
+        # DaeModel rebuilds the states and parameters on every call, so get
+        # them only once for the whole export.
+        self._states = self.dae.get_states()
+        self._params = self.dae.get_parameters()
+        self._update_ids(self._states, self._params)
+
+        try:
+            out = self._write_class()
+        finally:
+            # The snapshot is only valid during this export.
+            self._states = None
+            self._params = None
+            self._x_states = None
+            self._assigment_states = None
+
+        # Create and open the file to export. It is written as bytes, encoded
+        # once, to skip the text layer and its newline translation.
+        with open(filepath, "wb", buffering=_BUFFER_SIZE) as f:
+            f.write("".join(out).encode("utf-8"))
 
         return filepath
 
-    def write_class_header(self, f):
+    def _write_class(self):
+        """Return the pieces of the class file for the current snapshot."""
+        # Split the states, in model order, into the ODE and algebraic states
+        # that form the state vector x and the assigment states.
+        self._x_states = []
+        self._assigment_states = []
+        for state in self._states:
+            if state["type"] in (StateType.ODE, StateType.ALGEBRAIC):
+                self._x_states.append(state)
+            elif state["type"] == StateType.ASSIGMENT:
+                self._assigment_states.append(state)
+
+        # Buffer the whole file in memory and write it at once.
+        out = []
+
+        self.write_class_header(out)
+        self.write_constructor(out)
+        self.write_default_parameters(out)
+        self.write_initial_conditions(out)
+        self.write_mass_matrix(out)
+        self.write_simulation_options(out)
+        self.write_ode(out)
+        self.write_simout_2_struct(out)
+        self.write_plot(out)
+
+        out.append(_END_CLASS)
+
+        return out
+
+    def _update_ids(self, states, parameters):
+        """Set the ids used in formulas, forgetting translations if they change."""
+        param_ids = frozenset(item["id"] for item in parameters)
+        state_ids = frozenset(item["id"] for item in states)
+
+        if param_ids != self._param_ids or state_ids != self._state_ids:
+            self._param_ids = param_ids
+            self._state_ids = state_ids
+            self.string2matlab.cache_clear()
+            self.get_states.cache_clear()
+
+    def write_class_header(self, out):
         """Write into file the header of the class file."""
-        # Function header.
-        f.write(f"classdef {self.dae.get_model_name()}\n")
-        self.write_warning(f, 1)
-
-        # Write the properties.
-        f.write("\tproperties\n")
-        f.write("\t\tp      % Default model parameters.\n")
-        f.write("\t\tx0     % Default initial conditions.\n")
-        f.write("\t\tM      % Mass matrix for DAE systems.\n")
-        f.write("\t\topts   % Simulation options.\n")
-        f.write("\tend\n")
-        f.write("\n")
-
-        # Write the methods.
-        f.write("\tmethods\n")
-
-    def write_warning(self, f, tab=0):
-        """Write warning comment into f."""
-        tab = "\t" * tab
-
-        f.write(f"{tab}% This file was automatically generated by OneModel.\n")
-        f.write(f"{tab}% Any changes you make to it will be overwritten")
-        f.write(" the next time\n")
-        f.write(f"{tab}% the file is generated.\n\n")
-
-    def write_constructor(self, f):
-        """Write class constructor into f."""
-        f.write(f"\t\tfunction obj = {self.dae.get_model_name()}()\n")
-        f.write(f"\t\t\t%% Constructor of {self.dae.get_model_name()}.\n")
-        f.write("\t\t\tobj.p    = obj.default_parameters();\n")
-        f.write("\t\t\tobj.x0   = obj.initial_conditions();\n")
-        f.write("\t\t\tobj.M    = obj.mass_matrix();\n")
-        f.write("\t\t\tobj.opts = obj.simulation_options();\n")
-        f.write("\t\tend\n")
-        f.write("\n")
-
-    def write_default_parameters(self, f):
+        out.append(
+            _CLASS_HEADER_TEMPLATE.format(name=self.dae.get_model_name(), warning=_WARNINGS[1])
+        )
+
+    def write_constructor(self, out):
+        """Write class constructor into out."""
+        out.append(_CONSTRUCTOR_TEMPLATE.format(name=self.dae.get_model_name()))
+
+    def write_default_parameters(self, out):
         """Write method which returns default parameters."""
-        f.write("\t\tfunction p = default_parameters(~)\n")
-        f.write("\t\t\t%% Default parameters value.\n")
-        f.write("\t\t\tp = [];\n")
-        for item in self.dae.get_parameters():
-            f.write(f'\t\t\tp.{item["id"]} = {item["value"]};\n')
-        f.write("\t\tend\n")
-        f.write("\n")
-
-    def write_initial_conditions(self, f):
+        out.append("\t\tfunction p = default_parameters(~)\n")
+        out.append("\t\t\t%% Default parameters value.\n")
+        out.append("\t\t\tp = [];\n")
+        for item in self._params:
+            out.append(f'\t\t\tp.{item["id"]} = {item["value"]};\n')
+        out.append(_END_METHOD)
+
+    def write_initial_conditions(self, out):
         """Write method which returns default initial conditions."""
-        f.write("\t\tfunction x0 = initial_conditions(~)\n")
-        f.write("\t\t\t%% Default initial conditions.\n")
+        out.append("\t\tfunction x0 = initial_conditions(~)\n")
+        out.append("\t\t\t%% Default initial conditions.\n")
 
-        f.write("\t\t\tx0 = [\n")
-        for item in self.dae.get_states():
+        out.append("\t\t\tx0 = [\n")
+        for item in self._x_states:
             if item["type"] == StateType.ODE:
-                f.write(f'\t\t\t\t{item["initialCondition"]} % {item["id"]}\n')
-            elif item["type"] == StateType.ALGEBRAIC:
-                f.write(f'\t\t\t\t{item["initialCondition"]}')
-                f.write(f'% {item["id"]} (algebraic)\n')
-        f.write("\t\t\t];\n")
+                out.append(f'\t\t\t\t{item["initialCondition"]} % {item["id"]}\n')
+            else:
+                out.append(f'\t\t\t\t{item["initialCondition"]}')
+                out.append(f'% {item["id"]} (algebraic)\n')
+        out.append("\t\t\t];\n")
 
-        f.write("\t\tend\n")
-        f.write("\n")
+        out.append(_END_METHOD)
 
-    def write_mass_matrix(self, f):
+    def write_mass_matrix(self, out):
         """Write method which returns the mass matrix."""
-        f.write("\t\tfunction M = mass_matrix(~)\n")
-        f.write("\t\t\t%% Mass matrix for DAE systems.\n")
+        out.append("\t\tfunction M = mass_matrix(~)\n")
+        out.append("\t\t\t%% Mass matrix for DAE systems.\n")
 
-        f.write("\t\t\tM = [\n")
-        m = []
-        for item in self.dae.get_states():
-            if item["type"] == StateType.ODE:
-                m.append(1)
-            elif item["type"] == StateType.ALGEBRAIC:
-                m.append(0)
-
-        i = 0
-        i_max = len(m)
-        while i < i_max:
-            f.write("\t\t\t\t")
-            f.write("0 " * i)
-            f.write(f"{m[i]} ")
-            f.write("0 " * (i_max - i - 1))
-            f.write("\n")
-            i += 1
-
-        f.write("\t\t\t];\n")
-
-        f.write("\t\tend\n")
-        f.write("\n")
-
-    def write_simulation_options(self, f):
+        # The mass matrix is diagonal, 1 for ODE states and 0 for algebraic
+        # states, so only its diagonal is written.
+        m = " ".join("1" if item["type"] == StateType.ODE else "0" for item in self._x_states)
+        out.append(f"\t\t\tM = diag([{m}]);\n")
+
+        out.append(_END_METHOD)
+
+    def write_simulation_options(self, out):
         """Write method which returns the mass matrix."""
-        f.write("\t\tfunction opts = simulation_options(~)\n")
-        f.write("\t\t\t%% Default simulation options.\n")
+        out.append("\t\tfunction opts = simulation_options(~)\n")
+        out.append("\t\t\t%% Default simulation options.\n")
 
         options = self.dae.get_options()
         for item in options:
             value = options.get(item, None)
-            f.write(f"\t\t\topts.{item} = {value};\n")
+            out.append(f"\t\t\topts.{item} = {value};\n")
 
-        f.write("\t\tend\n")
-        f.write("\n")
+        out.append(_END_METHOD)
 
-    def write_local_states(self, f):
+    def write_local_states(self, out):
         """Write all the states as local variables in the method."""
-        # List of states that are already defined in the file.
-        known_states = []
-        states_num = len(self.dae.get_states())
+        # Set of states that are already defined in the file.
+        known_states = set()
 
         # Write ODE and ALGEBRAIC states.
-        f.write("\t\t\t% ODE and algebraic states:\n")
-        i = 1
-        for state in self.dae.get_states():
-            # Skip not ODE or ALGEBRAIC states.
-            if not state["type"] in (StateType.ODE, StateType.ALGEBRAIC):
-                continue
-
-            f.write(f'\t\t\t{state["id"]} = x({i},:);\n')
-            known_states.append(state["id"])
-            i += 1
-        f.write("\n")
-
-        f.write("\t\t\t% Assigment states:\n")
-
-        while len(known_states) != states_num:
-            for state in self.dae.get_states():
-                # Skip not ASSIGMENT states.
-                if not state["type"] == StateType.ASSIGMENT:
-                    continue
-
-                # Skipe states that are already defined.
-                if state["id"] in known_states:
-                    continue
-
-                dependencies = self.get_states(state["equation"])
-
-                if all(elem in known_states for elem in dependencies):
-                    equation = self.string2matlab(state["equation"])
-                    f.write(f'\t\t\t{state["id"]} = {equation};\n')
-                    known_states.append(state["id"])
-
-        f.write("\n")
-
-    def write_ode(self, f):
+        out.append("\t\t\t% ODE and algebraic states:\n")
+        for i, state in enumerate(self._x_states, 1):
+            out.append(f'\t\t\t{state["id"]} = x({i},:);\n')
+            known_states.add(state["id"])
+        out.append("\n")
+
+        # Most models have no assigment states, skip resolving them.
+        if not self._assigment_states:
+            out.append("\t\t\t% (no assignment states)\n\n")
+            return
+
+        out.append("\t\t\t% Assigment states:\n")
+
+        # An assigment state can only be written once all the states in its
+        # equation are known, so sort them topologically (Kahn's algorithm).
+        assigments = self._assigment_states
+
+        # Pending dependencies of each assigment state, and the assigment
+        # states that depend on each state.
+        dependencies = {}
+        dependents = {}
+        for state in assigments:
+            pending = set(self.get_states(state["equation"])) - known_states
+            dependencies[state["id"]] = pending
+            for dep in pending:
+                dependents.setdefault(dep, []).append(state)
+
+        ready = deque(s for s in assigments if not dependencies[s["id"]])
+
+        while ready:
+            state = ready.popleft()
+
+            equation = self.string2matlab(state["equation"])
+            out.append(f'\t\t\t{state["id"]} = {equation};\n')
+            known_states.add(state["id"])
+
+            for dependent in dependents.get(state["id"], ()):
+                pending = dependencies[dependent["id"]]
+                pending.discard(state["id"])
+                if not pending:
+                    ready.append(dependent)
+
+        unresolved = [s["id"] for s in assigments if s["id"] not in known_states]
+        if unresolved:
+            raise ValueError(
+                f"Could not resolve the dependencies of the assigment states: {unresolved}"
+            )
+
+        out.append("\n")
+
+    def write_ode(self, out):
         """Write method which evaluates the ODE."""
-        f.write("\t\tfunction dx = ode(~,t,x,p)\n")
-        f.write("\t\t\t%% Evaluate the ODE.\n")
-        f.write("\t\t\t%\n")
-
-        # Comment arguments.
-        f.write("\t\t\t% Args:\n")
-        f.write("\t\t\t%\t t Current time in the simulation.\n")
-        f.write("\t\t\t%\t x Array with the state value.\n")
-        f.write("\t\t\t%\t p Struct with the parameters.\n")
-        f.write("\t\t\t%\n")
-
-        # Comment return.
-        f.write("\t\t\t% Return:\n")
-        f.write("\t\t\t%\t dx Array with the ODE.\n")
-        f.write("\n")
+        out.append(_ODE_HEADER)
 
-        self.write_local_states(f)
+        self.write_local_states(out)
 
         # Generate ODE equations.
-        i = 1
-        for item in self.dae.get_states():
-            string = f'\t\t\t% der({item["id"]})\n'
-
-            if item["type"] == StateType.ODE:
-                equation = self.string2matlab(item["equation"])
-                string += f"\t\t\tdx({i},1) = {equation};\n\n"
-                f.write(string)
-                i += 1
-
-            elif item["type"] == StateType.ALGEBRAIC:
-                equation = self.string2matlab(item["equation"])
-                string += f"\t\t\tdx({i},1) = {equation};\n\n"
-                f.write(string)
-                i += 1
-
-        f.write("\t\tend\n")
-
-    def write_simout_2_struct(self, f):
+        template = "\t\t\t%% der(%s)\n\t\t\tdx(%d,1) = %s;\n\n"
+        equations = [(item["id"], self.string2matlab(item["equation"])) for item in self._x_states]
+        out.append(
+            "".join(
+                template % (state_id, i, equation)
+                for i, (state_id, equation) in enumerate(equations, 1)
+            )
+        )
+
+        out.append("\t\tend\n")
+
+    def write_simout_2_struct(self, out):
         """Write method which calculate all the states of a simulation."""
-        f.write("\t\tfunction out = simout2struct(~,t,x,p)\n")
-        f.write("\t\t\t%% Convert the simulation output into")
-        f.write(" an easy-to-use struct.\n")
-        f.write("\n")
+        out.append("\t\tfunction out = simout2struct(~,t,x,p)\n")
+        out.append("\t\t\t%% Convert the simulation output into")
+        out.append(" an easy-to-use struct.\n")
+        out.append("\n")
 
-        f.write("\t\t\t% We need to transpose state matrix.\n")
-        f.write("\t\t\tx = x';")
-        f.write("\n")
+        out.append("\t\t\t% We need to transpose state matrix.\n")
+        out.append("\t\t\tx = x';")
+        out.append("\n")
 
-        self.write_local_states(f)
+        self.write_local_states(out)
 
         # Save the time.
-        f.write("\t\t\t% Save simulation time.\n")
-        f.write("\t\t\tout.t = t;")
-        f.write("\n")
+        out.append("\t\t\t% Save simulation time.\n")
+        out.append("\t\t\tout.t = t;")
+        out.append("\n")
 
         # Crate ones vector.
-        f.write("\n")
-        f.write("\t\t\t% Vector for extending single-value states")
-        f.write(" and parameters.\n")
-        f.write("\t\t\tones_t = ones(size(t'));\n")
-        f.write("\n")
-
-        # Save states.
-        f.write("\n\t\t\t% Save states.\n")
-        for item in self.dae.get_states():
-            f.write(f'\t\t\tout.{item["id"]} = ({item["id"]}.*ones_t)\';\n')
-        f.write("\n")
+        out.append("\n")
+        out.append("\t\t\t% Vector for extending single-value states")
+        out.append(" and parameters.\n")
+        out.append("\t\t\tones_t = ones(size(t'));\n")
+        out.append("\n")
+
+        # Save states. The values are collected before the names, so a state
+        # called "names" is saved before being overwritten.
+        ids = [item["id"] for item in self._states]
+        out.append("\n\t\t\t% Save states.\n")
+        out.append("\t\t\tvalues = {%s};\n" % ", ".join(ids))
+        out.append("\t\t\tnames = {%s};\n" % ", ".join(f"'{i}'" for i in ids))
+        out.append("\t\t\tfor i = 1:numel(names)\n")
+        out.append("\t\t\t\tout.(names{i}) = (values{i}.*ones_t)';\n")
+        out.append("\t\t\tend\n")
+        out.append("\n")
 
         # Save parameters.
-        f.write("\t\t\t% Save parameters.\n")
-        for item in self.dae.get_parameters():
-            f.write(f'\t\t\tout.{item["id"]} = (p.{item["id"]}.*ones_t)\';\n')
-        f.write("\n")
+        ids = [item["id"] for item in self._params]
+        out.append("\t\t\t% Save parameters.\n")
+        out.append("\t\t\tnames = {%s};\n" % ", ".join(f"'{i}'" for i in ids))
+        out.append("\t\t\tfor i = 1:numel(names)\n")
+        out.append("\t\t\t\tout.(names{i}) = (p.(names{i}).*ones_t)';\n")
+        out.append("\t\t\tend\n")
+        out.append("\n")
 
-        f.write("\t\tend\n")
+        out.append("\t\tend\n")
 
-    def write_plot(self, f):
+    def write_plot(self, out):
         """Write method which plot simulation result."""
-        f.write("\t\tfunction plot(~,out)\n")
-        f.write("\t\t\t%% Plot simulation result.\n")
+        out.append("\t\tfunction plot(~,out)\n")
+        out.append("\t\t\t%% Plot simulation result.\n")
 
         # Get all the states we want to plot.
-        states = self.dae.get_states()
+        states = self._states
 
         # Separate states in the different contexts.
-        contexts = {}
+        contexts = defaultdict(list)
         for state in states:
-            c = state["context"]
-            if contexts.get(c, None) is None:
-                contexts[c] = [state]
-            else:
-                contexts[c].append(state)
+            contexts[state["context"]].append(state)
+
+        template = (
+            "\t\t\tsubplot(%d,%d,%d);\n"
+            "\t\t\tplot(out.t, out.%s);\n"
+            '\t\t\ttitle("%s");\n'
+            "\t\t\tylim([0, +inf]);\n"
+            "\t\t\tgrid on;\n"
+            "\n"
+        )
 
         for context in contexts:
 
             states = contexts[context]
 
-            # Calculate the size of the subplot.
-            n = math.sqrt(len(states))
-            x = math.ceil(n)
-            y = x
-            while x * (y - 1) >= len(states):
-                y -= 1
+            # Calculate the size of the subplot: the smallest square side x and
+            # then the fewest y columns that fit all the states.
+            n = len(states)
+            x = math.ceil(math.sqrt(n))
+            y = -(-n // x)
 
-            f.write(f"\t\t\tfigure('Name','{context}');\n")
+            out.append(f"\t\t\tfigure('Name','{context}');\n")
 
             # Write subplots.
-            for i in range(len(states)):
-                f.write(f"\t\t\tsubplot({x},{y},{i+1});\n")
-                f.write(f'\t\t\tplot(out.t, out.{states[i]["id"]});\n')
-                f.write(f'\t\t\ttitle("{states[i]["id"]}");\n')
-                f.write("\t\t\tylim([0, +inf]);\n")
-                f.write("\t\t\tgrid on;\n")
-                f.write("\n")
+            for i, state in enumerate(states, 1):
+                out.append(template % (x, y, i, state["id"], state["id"]))
 
-        f.write("\t\tend\n")
+        out.append("\t\tend\n")
 
     def string2matlab(self, math_expr):
         """Parses a libSBML math string formula into a matlab expression.
@@ -355,44 +438,14 @@ class Matlab:
             math_expr: str
                 Math formula obtained with libSBML.formulaToL3String()
         """
-        result = ""
-
-        parameters = []
-        for item in self.dae.get_parameters():
-            parameters.append(item["id"])
-
-        g = tokenize(BytesIO(math_expr.encode("utf-8")).readline)
-
-        for toknum, tokval, _, _, _ in g:
-            if toknum == ENCODING:
-                continue
-
-            elif toknum == NAME and tokval in parameters:
-                result += "p." + str(tokval)
-
-            elif toknum == OP and tokval in ("*", "/", "^"):
-                result += "." + str(tokval)
+        parts = _TOKEN_RE.split(math_expr)
 
-            elif toknum == OP and tokval in ("+", "-"):
-                result += " " + str(tokval) + " "
+        # Even items are the operators between tokens, odd items the tokens.
+        parts[::2] = [chunk.translate(_OPERATORS) for chunk in parts[::2]]
+        parts[1::2] = ["p." + tok if tok in self._param_ids else tok for tok in parts[1::2]]
 
-            else:
-                result += str(tokval)
-
-        return result
+        return "".join(parts)
 
     def get_states(self, math_expr):
-        """Return a list with the states present in the string."""
-        result = []
-
-        states = []
-        for state in self.dae.get_states():
-            states.append(state["id"])
-
-        g = tokenize(BytesIO(math_expr.encode("utf-8")).readline)
-
-        for toknum, tokval, _, _, _ in g:
-            if toknum == NAME and tokval in states:
-                result.append(tokval)
-
-        return result
+        """Return a tuple with the states present in the string."""
+        return tuple(tok for tok in _TOKEN_RE.findall(math_expr) if tok in self._state_ids)
@@ -60,3 +60,139 @@ def read_file_contents(filepath):
     file.close()
 
     return result
+
+
+def write_assigment_model(output_dir, name, rules):
+    """Write a SBML model with a single ODE state x and assigment rules.
+
+    Arguments:
+        rules: list of (variable, ci) tuples
+            Each rule assigns to its variable the value of the ci identifier.
+            The variables become non-constant parameters, in the given order.
+    """
+    parameters = "".join(
+        f'<parameter id="{variable}" value="0" constant="false"/>' for variable, _ in rules
+    )
+    assigments = "".join(
+        f'<assignmentRule variable="{variable}">'
+        '<math xmlns="http://www.w3.org/1998/Math/MathML">'
+        f"<ci> {ci} </ci>"
+        "</math>"
+        "</assignmentRule>"
+        for variable, ci in rules
+    )
+
+    filepath = f"{output_dir}/{name}.xml"
+    file = open(filepath, "w")
+    file.write(
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<sbml xmlns="http://www.sbml.org/sbml/level3/version2/core" level="3" version="2">'
+        f'<model id="{name}">'
+        "<listOfCompartments>"
+        '<compartment id="c" spatialDimensions="3" size="1" constant="true"/>'
+        "</listOfCompartments>"
+        "<listOfSpecies>"
+        '<species id="x" compartment="c" initialConcentration="0"'
+        ' hasOnlySubstanceUnits="false" boundaryCondition="false" constant="false"/>'
+        "</listOfSpecies>"
+        f"<listOfParameters>{parameters}</listOfParameters>"
+        f"<listOfRules>{assigments}</listOfRules>"
+        "</model>"
+        "</sbml>"
+    )
+    file.close()
+
+    return filepath
+
+
+def test_assigment_states_order(tmpdir) -> None:
+    """Test that assigment states are emitted in dependency (FIFO) order."""
+    filepath = write_assigment_model(tmpdir, "order", [("a", "x"), ("b", "a"), ("c", "x")])
+    matlab = load_example(filepath, tmpdir)
+    class_file = read_file_contents(matlab.export_class())
+
+    # States ready from the start (a and c) go first, then the ones that
+    # depend on them (b).
+    assert "\t\t\t% Assigment states:\n\t\t\ta = x;\n\t\t\tc = x;\n\t\t\tb = a;\n" in class_file
+
+
+def test_assigment_states_circular(tmpdir) -> None:
+    """Test that circular assigment states raise an error."""
+    filepath = write_assigment_model(tmpdir, "circular", [("a", "b"), ("b", "a")])
+    matlab = load_example(filepath, tmpdir)
+
+    with pytest.raises(ValueError, match="assigment states"):
+        matlab.export_class()
+
+
+@pytest.mark.parametrize(
+    "math_expr, expected",
+    [
+        # Exponents are part of the number, not an operator.
+        ("1e-5 * k_m", "1e-5.*p.k_m"),
+        ("2.5E+3 / mRNA", "2.5E+3./mRNA"),
+        ("k_p * 1E3", "p.k_p.*1E3"),
+        # Numbers without integer part.
+        (".5 * k_m", ".5.*p.k_m"),
+        ("0.5 * mRNA", "0.5.*mRNA"),
+        # Unary minus after an operator.
+        ("mRNA^-2", "mRNA.^ - 2"),
+        ("k_m * -mRNA", "p.k_m.* - mRNA"),
+        ("-k_m + mRNA", " - p.k_m + mRNA"),
+        ("exp(-d_m * t)", "exp( - p.d_m.*t)"),
+        # Relational and logical operators are kept as they are.
+        ("mRNA >= k_m && protein < 1", "mRNA>=p.k_m&&protein<1"),
+        ("mRNA == 0 || protein != 1", "mRNA==0||protein!=1"),
+        ("piecewise(k_m, mRNA > 1e-3, 0)", "piecewise(p.k_m,mRNA>1e-3,0)"),
+        # Only whole parameter names get the prefix.
+        ("k_m_max + k_m - mk_m", "k_m_max + p.k_m - mk_m"),
+    ],
+)
+def test_string2matlab(tmpdir, math_expr: str, expected: str) -> None:
+    """Test the translation of libSBML formulas into matlab expressions."""
+    matlab = load_example("examples/ex01_simple_gene_expression.xml", tmpdir)
+
+    assert matlab.string2matlab(math_expr) == expected
+
+
+@pytest.mark.parametrize(
+    "math_expr, expected",
+    [
+        ("k_m * mRNA + protein^2 - mRNA", ("mRNA", "protein", "mRNA")),
+        ("1e-5 * protein", ("protein",)),
+        ("mRNA_total + protein", ("protein",)),
+    ],
+)
+def test_get_states(tmpdir, math_expr: str, expected: tuple) -> None:
+    """Test that the states present in a formula are found."""
+    matlab = load_example("examples/ex01_simple_gene_expression.xml", tmpdir)
+
+    assert matlab.get_states(math_expr) == expected
+
+
+def test_export_after_model_change(tmpdir) -> None:
+    """Test that a later export uses the ids of the current model."""
+    matlab = load_example("examples/ex01_simple_gene_expression.xml", tmpdir)
+    matlab.export_class()
+    assert matlab.string2matlab("k_new * mRNA") == "k_new.*mRNA"
+
+    parameter = matlab.dae.model.createParameter()
+    parameter.setId("k_new")
+    parameter.setValue(1)
+    parameter.setConstant(True)
+
+    class_file = read_file_contents(matlab.export_class())
+
+    assert "\t\t\tp.k_new = 1.0;\n" in class_file
+    assert matlab.string2matlab("k_new * mRNA") == "p.k_new.*mRNA"
+
+
+def test_failed_export_drops_snapshot(tmpdir) -> None:
+    """Test that a failed export does not keep the states snapshot."""
+    filepath = write_assigment_model(tmpdir, "circular", [("a", "b"), ("b", "a")])
+    matlab = load_example(filepath, tmpdir)
+
+    with pytest.raises(ValueError):
+        matlab.export_class()
+
+    assert matlab._states is None